@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import pytest
@@ -15,6 +16,15 @@ def initialize_tests(request):
     except ImportError:
         pass
 
+    # Opt-in, as users run the stock asyncio loop by default. The test cases run on the
+    # current event loop, so the uvloop loop has to be made current as well.
+    loop = None
+    if os.environ.get("TORTOISE_TEST_UVLOOP"):
+        import uvloop
+
+        loop = uvloop.new_event_loop()
+        asyncio.set_event_loop(loop)
+
     db_url = os.getenv("TORTOISE_TEST_DB", "sqlite://:memory:")
-    initializer(["tests.testmodels"], db_url=db_url)
+    initializer(["tests.testmodels"], db_url=db_url, loop=loop)
     request.addfinalizer(finalizer)
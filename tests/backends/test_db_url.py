@@ -308,6 +308,11 @@ class TestConfigGenerator(test.SimpleTestCase):
             },
         )
 
+    def test_psycopg_batch_inserts(self):
+        for value, expected in (("true", True), ("1", True), ("false", False), ("0", False)):
+            res = expand_db_url(f"psycopg://postgres@127.0.0.1/test?batch_inserts={value}")
+            self.assertIs(res["credentials"]["batch_inserts"], expected)
+
     def test_mysql_params(self):
         res = expand_db_url(
             "mysql://root:@127.0.0.1:3306/test?AHA=5&moo=yes&maxsize=20&minsize=5"
@@ -2,12 +2,20 @@
 Test some PostgreSQL-specific features
 """
 
+import asyncio
 import ssl
+from unittest.mock import patch
 
-from tests.testmodels import Tournament
+from tests.testmodels import Tournament, UniqueName
 from tortoise import Tortoise, connections
 from tortoise.contrib import test
-from tortoise.exceptions import OperationalError
+from tortoise.exceptions import (
+    DBConnectionError,
+    IntegrityError,
+    OperationalError,
+    TransactionManagementError,
+)
+from tortoise.transactions import in_transaction
 
 
 class TestPostgreSQL(test.SimpleTestCase):
@@ -100,3 +108,279 @@ class TestPostgreSQL(test.SimpleTestCase):
 
         self.assertEqual(len(res), 1)
         self.assertEqual("mytest_application", res[0]["application_name"])
+
+    async def test_execute_query_pipelined(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        results = await conn.execute_query_pipelined(
+            [
+                ('INSERT INTO "tournament" ("name", "created") VALUES (%s, NOW())', ["One"]),
+                ('INSERT INTO "tournament" ("name", "created") VALUES (%s, NOW())', ["Two"]),
+                ('SELECT "name" FROM "tournament" ORDER BY "name"', None),
+            ]
+        )
+
+        self.assertEqual(results, [(1, []), (1, []), (2, [{"name": "One"}, {"name": "Two"}])])
+
+    async def test_execute_query_pipelined_without_pipeline(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        import psycopg
+
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        # psycopg < 3.1 has no Pipeline
+        with patch.object(psycopg, "Pipeline", None):
+            results = await conn.execute_query_pipelined(
+                [
+                    ('INSERT INTO "tournament" ("name", "created") VALUES (%s, NOW())', ["One"]),
+                    ('SELECT "name" FROM "tournament"', None),
+                ]
+            )
+
+        self.assertEqual(results, [(1, []), (1, [{"name": "One"}])])
+
+    async def test_execute_query_pipelined_is_atomic(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        with self.assertRaises(OperationalError):
+            await conn.execute_query_pipelined(
+                [
+                    ('INSERT INTO "tournament" ("name", "created") VALUES (%s, NOW())', ["One"]),
+                    ("SELECT * FROM nonexistent", None),
+                ]
+            )
+
+        self.assertEqual(await Tournament.all().count(), 0)
+
+    async def test_execute_query_tuple_rows(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        from psycopg.rows import tuple_row
+
+        await Tortoise.init(self.db_config, _create_db=True)
+
+        conn = connections.get("models")
+        rowcount, rows = await conn.execute_query(
+            "SELECT 1 AS a, %s::text AS b", ["x"], row_factory=tuple_row
+        )
+
+        self.assertEqual(rowcount, 1)
+        self.assertEqual(rows, [(1, "x")])
+
+    async def test_execute_query_fetch(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        await Tortoise.init(self.db_config, _create_db=True)
+
+        conn = connections.get("models")
+        query = "SELECT * FROM generate_series(1, 3) AS x"
+        self.assertEqual(await conn.execute_query(query), (3, [{"x": 1}, {"x": 2}, {"x": 3}]))
+        self.assertEqual(await conn.execute_query(query, fetch="one"), (3, [{"x": 1}]))
+        self.assertEqual(await conn.execute_query(query, fetch="none"), (3, []))
+
+    async def test_execute_query_multiple_statements(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        await Tortoise.init(self.db_config, _create_db=True)
+
+        conn = connections.get("models")
+        for _ in range(10):
+            self.assertEqual(
+                await conn.execute_query("SELECT 1 AS x; SELECT 2 AS x"), (1, [{"x": 1}])
+            )
+
+    async def test_batch_inserts(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        self.db_config["connections"]["models"]["credentials"]["batch_inserts"] = True
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        tournaments = await asyncio.gather(*(Tournament.create(name=str(i)) for i in range(10)))
+        self.assertEqual(
+            await Tournament.all().order_by("id").values_list("id", "name"),
+            [(tournament.id, tournament.name) for tournament in tournaments],
+        )
+
+    async def test_batch_inserts_error(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        self.db_config["connections"]["models"]["credentials"]["batch_inserts"] = True
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        results = await asyncio.gather(
+            UniqueName.create(name="a"),
+            UniqueName.create(name="b"),
+            UniqueName.create(name="a"),
+            return_exceptions=True,
+        )
+
+        self.assertIsInstance(results[2], IntegrityError)
+        self.assertEqual(
+            await UniqueName.all().order_by("id").values_list("id", "name"),
+            [(results[0].id, "a"), (results[1].id, "b")],
+        )
+
+    async def test_batch_inserts_connection_error(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        self.db_config["connections"]["models"]["credentials"]["batch_inserts"] = True
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        error = DBConnectionError("Connection lost")
+        with patch.object(conn, "execute_query", side_effect=error):
+            with patch.object(conn, "_execute_insert") as execute_insert:
+                results = await asyncio.gather(
+                    *(Tournament.create(name=str(i)) for i in range(3)), return_exceptions=True
+                )
+
+        self.assertEqual(results, [error] * 3)
+        execute_insert.assert_not_called()
+
+    async def test_bulk_create_copy(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        import psycopg
+
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        with patch.object(psycopg.AsyncCursor, "executemany") as executemany:
+            await Tournament.bulk_create(
+                [
+                    Tournament(name=f"Test {i}", desc=None if i % 2 else "")
+                    for i in range(conn.copy_threshold)
+                ]
+            )
+        executemany.assert_not_called()
+
+        self.assertEqual(
+            await Tournament.all().order_by("id").values_list("name", "desc"),
+            [(f"Test {i}", None if i % 2 else "") for i in range(conn.copy_threshold)],
+        )
+
+    async def test_bulk_create_copy_error(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        import psycopg
+
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        with patch.object(psycopg.AsyncCursor, "executemany") as executemany:
+            with self.assertRaises(IntegrityError):
+                await UniqueName.bulk_create(
+                    [UniqueName(name="a") for _ in range(conn.copy_threshold)]
+                )
+        executemany.assert_not_called()
+
+    async def test_bulk_create_below_copy_threshold(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        import psycopg
+
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        conn = connections.get("models")
+        executemany_calls = []
+        original_executemany = psycopg.AsyncCursor.executemany
+
+        async def executemany(cursor, *args, **kwargs):
+            executemany_calls.append(args)
+            return await original_executemany(cursor, *args, **kwargs)
+
+        with patch.object(psycopg.AsyncCursor, "executemany", executemany):
+            await Tournament.bulk_create(
+                [Tournament(name=f"Test {i}") for i in range(conn.copy_threshold - 1)]
+            )
+        self.assertEqual(len(executemany_calls), 1)
+        self.assertEqual(await Tournament.all().count(), conn.copy_threshold - 1)
+
+    async def test_concurrent_nested_transactions(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        await Tortoise.init(self.db_config, _create_db=True)
+        await Tortoise.generate_schemas()
+
+        first_entered = asyncio.Event()
+        second_entered = asyncio.Event()
+        first_exited = asyncio.Event()
+
+        async def first():
+            try:
+                async with in_transaction():
+                    await Tournament.create(name="First")
+                    first_entered.set()
+                    await second_entered.wait()
+            finally:
+                first_exited.set()
+
+        async def second():
+            await first_entered.wait()
+            async with in_transaction():
+                second_entered.set()
+                await first_exited.wait()
+                raise ValueError("Some error")
+
+        with self.assertRaises(ZeroDivisionError):
+            async with in_transaction():
+                results = await asyncio.gather(first(), second(), return_exceptions=True)
+                # The first block would release the savepoint of the second one
+                self.assertIsInstance(results[0], TransactionManagementError)
+                self.assertIsInstance(results[1], ValueError)
+                raise ZeroDivisionError()
+
+        self.assertEqual(await Tournament.all().count(), 0)
+
+    async def test_rollback_clears_prepared_statements(self):
+        if not self.is_psycopg:
+            raise test.SkipTest("psycopg only")
+        # psycopg notices a rollback by itself only the first time it sees the statement on a
+        # connection, so make sure the same connection has run a rollback before.
+        self.db_config["connections"]["models"]["credentials"]["minsize"] = 1
+        self.db_config["connections"]["models"]["credentials"]["maxsize"] = 1
+        await Tortoise.init(self.db_config, _create_db=True)
+        conn = connections.get("models")
+        with self.assertRaises(ValueError):
+            async with in_transaction():
+                raise ValueError("Some error")
+
+        async def create_and_rollback():
+            with self.assertRaises(ValueError):
+                async with in_transaction() as tx_conn:
+                    await tx_conn.execute_script('CREATE TABLE "temp" ("x" INT)')
+                    for _ in range(10):
+                        await tx_conn.execute_query('SELECT * FROM "temp"')
+                    raise ValueError("Some error")
+
+        async def check_result_type(conn):
+            # A statement prepared before the rollback would fail, as the type of the result
+            # has changed
+            await conn.execute_script('CREATE TABLE "temp" ("x" TEXT)')
+            await conn.execute_script("INSERT INTO \"temp\" VALUES ('a')")
+            self.assertEqual(await conn.execute_query('SELECT * FROM "temp"'), (1, [{"x": "a"}]))
+
+        await create_and_rollback()
+        await check_result_type(conn)
+        await conn.execute_script('DROP TABLE "temp"')
+
+        async with in_transaction() as tx_conn:
+            await create_and_rollback()
+            await check_result_type(tx_conn)
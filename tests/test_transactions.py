@@ -63,6 +63,20 @@ class TestTransactions(test.IsolatedTestCase):
             set(["Test", "Nested 1", "Test 2", "Nested 2"]),
         )
 
+    @test.requireCapability(dialect="postgres")
+    async def test_explicit_rollback_in_nested_transaction(self):
+        async with in_transaction():
+            await Tournament.create(name="Outer 1")
+            async with in_transaction() as connection:
+                await Tournament.create(name="Inner", using_db=connection)
+                await connection.rollback()
+            await Tournament.create(name="Outer 2")
+
+        self.assertEqual(
+            await Tournament.all().order_by("id").values_list("name", flat=True),
+            ["Outer 1", "Outer 2"],
+        )
+
     async def test_caught_exception_in_nested_transaction(self):
         async with in_transaction():
             tournament = await Tournament.create(name="Test")
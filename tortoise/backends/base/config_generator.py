@@ -13,6 +13,12 @@ urlparse.uses_netloc.append("sqlite")
 urlparse.uses_netloc.append("mysql")
 urlparse.uses_netloc.append("oracle")
 urlparse.uses_netloc.append("mssql")
+
+
+def _str_to_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
 DB_LOOKUP: dict[str, dict[str, Any]] = {
     "psycopg": {
         "engine": "tortoise.backends.psycopg",
@@ -34,6 +40,7 @@ DB_LOOKUP: dict[str, dict[str, Any]] = {
             "max_cached_statement_lifetime": int,
             "max_cacheable_statement_size": int,
             "ssl": bool,
+            "batch_inserts": _str_to_bool,
         },
     },
     "asyncpg": {
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import logging
+import re
 from collections.abc import Callable
-from contextlib import _AsyncGeneratorContextManager
 from ssl import SSLContext
-from typing import Any, Type, TypeVar, cast
+from typing import Any, Literal, Type, TypeVar, final
 
 import psycopg
 import psycopg.conninfo
 import psycopg.pq
 import psycopg.rows
 import psycopg_pool
+from psycopg import sql
 from pypika_tortoise import SqlContext
 from pypika_tortoise.dialects.postgresql import PostgreSQLQuery, PostgreSQLQueryBuilder
 from pypika_tortoise.terms import Parameterizer
@@ -25,15 +28,186 @@ FuncType = Callable[..., Any]
 F = TypeVar("F", bound=FuncType)
 
 
+_EXCEPTIONS_MAP: dict[type[psycopg.Error], type[exceptions.BaseORMException]] = {
+    psycopg.errors.SyntaxErrorOrAccessRuleViolation: exceptions.OperationalError,
+    psycopg.errors.DataException: exceptions.OperationalError,
+    psycopg.errors.UndefinedTable: exceptions.OperationalError,
+    psycopg.errors.IntegrityError: exceptions.IntegrityError,
+    psycopg.errors.InvalidTransactionState: exceptions.TransactionManagementError,
+    psycopg.errors.InFailedSqlTransaction: exceptions.TransactionManagementError,
+}
+
+
+@functools.cache
+def _translated_exception(
+    exc_class: type[psycopg.Error],
+) -> type[exceptions.BaseORMException] | None:
+    """Finds the ORM exception for a psycopg error, taking its base classes into account."""
+    for klass in exc_class.__mro__:
+        if klass in _EXCEPTIONS_MAP:
+            return _EXCEPTIONS_MAP[klass]
+    return None
+
+
+@functools.lru_cache(maxsize=16)
+def _make_conninfo(
+    host: str | None,
+    port: int | str | None,
+    user: str | None,
+    password: str | None,
+    dbname: str | None,
+    server_settings: frozenset[tuple[str, Any]],
+) -> str:
+    """Builds the libpq connection string, cached as the test suite reconnects for every test."""
+    return psycopg.conninfo.make_conninfo(
+        host=host, port=port, user=user, password=password, dbname=dbname, **dict(server_settings)
+    )
+
+
+# Matches the statements the executor generates for bulk inserts, without ON CONFLICT clauses.
+# execute_many discards the rows of a RETURNING clause, so COPY can replace those as well.
+_INSERT_RE = re.compile(
+    r'INSERT INTO (?P<table>"[^"]+"(?:\."[^"]+")?) \((?P<columns>"[^"]+"(?:,"[^"]+")*)\) '
+    r'VALUES \((?P<placeholders>(?:%s,)*%s)\)(?: RETURNING "[^"]+"(?:,"[^"]+")*)?'
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _copy_statement(query: str) -> sql.Composed | None:
+    """The ``COPY FROM STDIN`` equivalent of a plain ``INSERT`` statement, if there is one."""
+    match = _INSERT_RE.fullmatch(query)
+    if not match or match["columns"].count(",") != match["placeholders"].count(","):
+        return None
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.SQL(match["table"]), sql.SQL(match["columns"])
+    )
+
+
+def _placeholder(_: int) -> str:
+    return "%s"
+
+
 class AsyncConnectionPool(psycopg_pool.AsyncConnectionPool):
     # TortoiseORM has this interface hardcoded in the tests so we need to support it
+    @final
     async def acquire(self, *args, **kwargs) -> psycopg.AsyncConnection:
         return await self.getconn(*args, **kwargs)
 
+    @final
     async def release(self, connection: psycopg.AsyncConnection):
         await self.putconn(connection)
 
 
+class _FastPoolConnectionWrapper(base_client.PoolConnectionWrapper[psycopg.AsyncConnection]):
+    """
+    Talks to the psycopg pool directly instead of going through the ``acquire``/``release``
+    shims, which saves a coroutine per query.
+    """
+
+    __slots__ = ()
+
+    async def __aenter__(self) -> psycopg.AsyncConnection:
+        await self.ensure_connection()
+        self.connection = await self.client._pool.getconn()
+        return self.connection
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.client._pool.putconn(self.connection)
+
+
+class _InsertBatcher:
+    """
+    Coalesces single-row inserts of the same statement that are issued in the same event loop
+    iteration, e.g. by ``asyncio.gather`` over ``Model.create``, into a multi-row INSERT.
+
+    The multi-row statement is atomic, so if it fails because of the values of a row, the rows
+    are inserted one by one instead, to report the error only to the caller whose row caused it.
+    """
+
+    # PostgreSQL accepts at most 65535 bind parameters per statement
+    MAX_PARAMETERS = 65535
+    INSERT_RE = re.compile(
+        r"(?P<head>INSERT INTO .+? VALUES )(?P<row>\((?:%s,)*%s\))(?P<tail>(?: RETURNING .+)?)",
+        re.DOTALL,
+    )
+
+    def __init__(self, client: PsycopgClient) -> None:
+        self.client = client
+        self._pending: dict[str, list[tuple[list, asyncio.Future]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def insert(self, query: str, values: list) -> Any | None:
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(query)
+        if batch is None:
+            batch = self._pending[query] = []
+            # The task only starts after the callers that are already scheduled get to run,
+            # so they can all add their row to this batch.
+            task = asyncio.create_task(self._flush(query))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.append((values, future))
+        return await future
+
+    async def _flush(self, query: str) -> None:
+        batch = self._pending.pop(query)
+        try:
+            match = self.INSERT_RE.fullmatch(query)
+            if len(batch) > 1 and match:
+                chunk_size = self.MAX_PARAMETERS // (match.group("row").count("%s"))
+                for start in range(0, len(batch), chunk_size):
+                    await self._insert_rows(match, batch[start : start + chunk_size])
+            else:
+                await self._insert_one_by_one(query, batch)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def _insert_rows(self, match: re.Match, batch: list[tuple[list, asyncio.Future]]) -> None:
+        query = "".join(
+            (match.group("head"), ",".join([match.group("row")] * len(batch)), match.group("tail"))
+        )
+        values = [value for row_values, _ in batch for value in row_values]
+        try:
+            # Every batch size makes a different statement, not worth preparing
+            _, rows = await self.client.execute_query(query, values, binary=True, prepare=False)
+        except Exception as exc:
+            if self._is_row_error(exc):
+                await self._insert_one_by_one(match.string, batch)
+            else:
+                # Retrying every row would only repeat e.g. a pool timeout for each caller
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(rows[i] if rows else None)
+
+    @staticmethod
+    def _is_row_error(exc: Exception) -> bool:
+        """Whether the error may have been caused by the values of a single row."""
+        if isinstance(exc, exceptions.IntegrityError):
+            return True
+        return isinstance(exc, exceptions.OperationalError) and isinstance(
+            exc.__context__, psycopg.errors.DataException
+        )
+
+    async def _insert_one_by_one(
+        self, query: str, batch: list[tuple[list, asyncio.Future]]
+    ) -> None:
+        for values, future in batch:
+            try:
+                result = await self.client._execute_insert(query, values)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
 class PsycopgSQLQuery(PostgreSQLQuery):
     @classmethod
     def _builder(cls, **kwargs) -> "PostgreSQLQueryBuilder":
@@ -49,7 +223,8 @@ class PsycopgSQLQueryBuilder(PostgreSQLQueryBuilder):
         if not ctx:
             ctx = self.QUERY_CLS.SQL_CONTEXT
         if not ctx.parameterizer:
-            ctx = ctx.copy(parameterizer=Parameterizer(placeholder_factory=lambda _: "%s"))
+            # Parameterizer collects the query values, so it can't be shared between queries
+            ctx = ctx.copy(parameterizer=Parameterizer(placeholder_factory=_placeholder))
         return super().get_parameterized_sql(ctx)
 
 
@@ -60,6 +235,13 @@ class PsycopgClient(postgres_client.BasePostgresClient):
     _pool: AsyncConnectionPool | None = None
     _connection: psycopg.AsyncConnection
     default_timeout: float = 30
+    # Bulk inserts of at least this many rows are loaded with COPY instead of INSERT statements
+    copy_threshold: int = 50
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.batch_inserts = bool(self.extra.pop("batch_inserts", False))
+        self._insert_batcher = _InsertBatcher(self)
 
     @postgres_client.translate_exceptions
     async def create_connection(self, with_db: bool) -> None:
@@ -78,13 +260,13 @@ class PsycopgClient(postgres_client.BasePostgresClient):
             else:
                 self.server_settings["sslmode"] = "require"
 
-        conninfo = psycopg.conninfo.make_conninfo(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            password=self.password,
-            dbname=self.database if with_db else None,
-            **self.server_settings,
+        conninfo = _make_conninfo(
+            self.host,
+            self.port,
+            self.user,
+            self.password,
+            self.database if with_db else None,
+            frozenset(self.server_settings.items()),
         )
 
         self._template = {
@@ -96,6 +278,8 @@ class PsycopgClient(postgres_client.BasePostgresClient):
                 "row_factory": psycopg.rows.dict_row,
             },
             "connection_class": psycopg.AsyncConnection,
+            # Let the pool open all of its connections concurrently when it needs to grow
+            "num_workers": self.pool_maxsize,
             **extra,
         }
 
@@ -115,6 +299,11 @@ class PsycopgClient(postgres_client.BasePostgresClient):
         await pool.open()
         return pool
 
+    def acquire_connection(
+        self,
+    ) -> base_client.ConnectionWrapper | base_client.PoolConnectionWrapper:
+        return _FastPoolConnectionWrapper(self, self._pool_init_lock)
+
     async def db_delete(self) -> None:
         try:
             return await super().db_delete()
@@ -122,7 +311,13 @@ class PsycopgClient(postgres_client.BasePostgresClient):
             pass
 
     async def execute_insert(self, query: str, values: list) -> Any | None:
-        inserted, rows = await self.execute_query(query, values)
+        if self.batch_inserts:
+            return await self._insert_batcher.insert(query, values)
+        return await self._execute_insert(query, values)
+
+    async def _execute_insert(self, query: str, values: list) -> Any | None:
+        # Only the generated columns are returned, and they all have binary loaders
+        _, rows = await self.execute_query(query, values, fetch="one", binary=True)
         if rows:
             return rows[0]
         else:
@@ -130,11 +325,18 @@ class PsycopgClient(postgres_client.BasePostgresClient):
 
     @postgres_client.translate_exceptions
     async def execute_many(self, query: str, values: list) -> None:
+        copy_statement = _copy_statement(query) if len(values) >= self.copy_threshold else None
         connection: psycopg.AsyncConnection
         async with self.acquire_connection() as connection:
             async with connection.cursor() as cursor:
-                self.log.debug("%s: %s", query, values)
-                await cursor.executemany(query, values)
+                if self.log.isEnabledFor(logging.DEBUG):
+                    self.log.debug("%s: %s", query, values)
+                if copy_statement is None:
+                    await cursor.executemany(query, values)
+                    return
+                async with cursor.copy(copy_statement) as copy:
+                    for row in values:
+                        await copy.write_row(row)
 
     @postgres_client.translate_exceptions
     async def execute_query(
@@ -142,22 +344,95 @@ class PsycopgClient(postgres_client.BasePostgresClient):
         query: str,
         values: list | None = None,
         row_factory=psycopg.rows.dict_row,
+        fetch: Literal["all", "one", "none"] = "all",
+        binary: bool = False,
+        prepare: bool | None = None,
     ) -> tuple[int, list[dict]]:
-        connection: psycopg.AsyncConnection
+        """
+        Executes a RAW SQL query statement, and returns the resultset.
+
+        Rows are dicts by default, as the executors look the columns up by name. Callers that
+        only need positional access can pass ``row_factory=psycopg.rows.tuple_row`` to avoid
+        building a dict for every row.
+
+        :param fetch: Whether to fetch ``"all"`` the rows, only the first ``"one"``,
+            or ``"none"`` of them when only the number of affected rows is needed.
+        :param binary: Whether to request the results in binary format.
+        :param prepare: Whether to prepare the statement on the server, see
+            ``psycopg.AsyncConnection.execute``. By default it is prepared once it has been
+            executed ``prepare_threshold`` times on the connection.
+        """
+        connection: psycopg.AsyncConnection[Any]
         async with self.acquire_connection() as connection:
-            cursor: psycopg.AsyncCursor | psycopg.AsyncServerCursor
-            async with connection.cursor(row_factory=row_factory) as cursor:
+            cursor: psycopg.AsyncCursor[Any]
+            if self.log.isEnabledFor(logging.DEBUG):
                 self.log.debug("%s: %s", query, values)
-                await cursor.execute(query, values)
+            if row_factory is psycopg.rows.dict_row:
+                # The pooled connections are created with dict_row already, so the cursor that
+                # connection.execute() creates can be used as is. Like the other cursors here, it
+                # is not closed: a client-side cursor holds no server resources.
+                cursor = await connection.execute(query, values, prepare=prepare, binary=binary)
+            else:
+                cursor = connection.cursor(row_factory=row_factory, binary=binary)
+                await cursor.execute(query, values, prepare=prepare)
+
+            rowcount = cursor.rowcount or cursor.rownumber or 0
+            rows: list[Any]
+
+            if (
+                fetch == "none"
+                or not cursor.pgresult
+                or cursor.pgresult.status != psycopg.pq.ExecStatus.TUPLES_OK
+            ):
+                rows = []
+            elif fetch == "one":
+                row = await cursor.fetchone()
+                rows = [row] if row is not None else []
+            else:
+                rows = await cursor.fetchall()
 
-                rowcount = int(cursor.rowcount or cursor.rownumber or 0)
+            return rowcount, rows
 
+    @postgres_client.translate_exceptions
+    async def execute_query_pipelined(
+        self, queries: list[tuple[str, list | None]]
+    ) -> list[tuple[int, list[dict]]]:
+        """
+        Executes several queries on a single connection, sending them all to the server
+        before waiting for any result, if the libpq in use supports pipeline mode.
+
+        The queries are sent as one batch, so if one of them fails, none of them take effect.
+
+        :param queries: A sequence of ``(query, values)`` pairs.
+        :return: A list of ``(rowcount, rows)`` tuples, in the same order as the queries.
+        """
+        connection: psycopg.AsyncConnection
+        async with self.acquire_connection() as connection:
+            cursors: list[psycopg.AsyncCursor[Any]] = []
+            # psycopg.Pipeline only exists since psycopg 3.1
+            pipeline_class = getattr(psycopg, "Pipeline", None)
+            if pipeline_class is not None and pipeline_class.is_supported():
+                async with connection.pipeline() as pipeline:
+                    for query, values in queries:
+                        if self.log.isEnabledFor(logging.DEBUG):
+                            self.log.debug("%s: %s", query, values)
+                        cursors.append(await connection.execute(query, values))
+                    await pipeline.sync()
+            else:
+                async with connection.transaction():
+                    for query, values in queries:
+                        if self.log.isEnabledFor(logging.DEBUG):
+                            self.log.debug("%s: %s", query, values)
+                        cursors.append(await connection.execute(query, values))
+
+            results = []
+            for cursor in cursors:
+                rowcount = cursor.rowcount or cursor.rownumber or 0
+                rows: list[dict] = []
                 if cursor.pgresult and cursor.pgresult.status == psycopg.pq.ExecStatus.TUPLES_OK:
                     rows = await cursor.fetchall()
-                else:
-                    rows = []
-
-                return rowcount, cast(list[dict], rows)
+                results.append((rowcount, rows))
+            return results
 
     async def execute_query_dict(self, query: str, values: list | None = None) -> list[dict]:
         rowcount, rows = await self.execute_query(query, values, row_factory=psycopg.rows.dict_row)
@@ -178,77 +453,147 @@ class PsycopgClient(postgres_client.BasePostgresClient):
     async def _translate_exceptions(self, func, *args, **kwargs) -> Exception:
         try:
             return await func(self, *args, **kwargs)
-        except (
-            psycopg.errors.SyntaxErrorOrAccessRuleViolation,
-            psycopg.errors.DataException,
-            psycopg.errors.UndefinedTable,
-        ) as exc:
-            raise exceptions.OperationalError(exc)
-        except psycopg.errors.IntegrityError as exc:
-            raise exceptions.IntegrityError(exc)
-        except (
-            psycopg.errors.InvalidTransactionState,
-            psycopg.errors.InFailedSqlTransaction,
-        ) as exc:
-            raise exceptions.TransactionManagementError(exc)
+        except psycopg.Error as exc:
+            translated = _translated_exception(type(exc))  # type: ignore[arg-type]
+            if translated is None:
+                raise
+            raise translated(exc)
 
     def _in_transaction(self) -> base_client.TransactionContext:
         return base_client.TransactionContextPooled(TransactionWrapper(self), self._pool_init_lock)
 
 
+class _NestedTransactionContext(base_client.NestedTransactionContext):
+    """
+    Nested blocks share the TransactionWrapper of the enclosing transaction, so each block
+    keeps track of its own savepoint, and finalizing a savepoint explicitly must not leave
+    the enclosing transaction marked as finalized.
+    """
+
+    __slots__ = ("savepoint",)
+
+    client: TransactionWrapper
+
+    async def __aenter__(self) -> TransactionWrapper:
+        self.savepoint = await self.client._savepoint()
+        return self.client
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        try:
+            if not self.client._finalized:
+                if exc_type:
+                    # Can't rollback a transaction that already failed.
+                    if exc_type is not exceptions.TransactionManagementError:
+                        await self.client._end_savepoint(self.savepoint, rollback=True)
+                else:
+                    await self.client._end_savepoint(self.savepoint, rollback=False)
+        finally:
+            self.client._finalized = False
+
+
 class TransactionWrapper(PsycopgClient, base_client.TransactionalDBClient):
     """A transactional connection wrapper for psycopg.
 
-    psycopg implements nested transactions (savepoints) natively, so we don't need to.
+    Nested blocks reuse the same wrapper, keeping a stack of the open savepoints. The
+    outermost transaction is controlled with plain statements, and savepoints with
+    ``psycopg.AsyncTransaction`` objects directly, instead of through the async generator
+    context manager of ``connection.transaction()``, which costs several awaits per block.
     """
 
     _connection: psycopg.AsyncConnection
+    _connection_wrapper: base_client.ConnectionWrapper[psycopg.AsyncConnection] | None
 
     def __init__(self, connection: PsycopgClient) -> None:
         self._connection: psycopg.AsyncConnection = connection._connection
         self._lock = asyncio.Lock()
+        self._connection_wrapper = None
         self.log = connection.log
         self.connection_name = connection.connection_name
-        self._transaction: _AsyncGeneratorContextManager[psycopg.AsyncTransaction] | None = None
+        # The open savepoints, None standing for the outermost transaction
+        self._transactions: list[psycopg.AsyncTransaction | None] = []
+        # Only ever goes up, so that concurrent nested blocks never share a savepoint name
+        self._savepoint_count = 0
         self._finalized = False
         self._parent = connection
 
     def _in_transaction(self) -> base_client.TransactionContext:
-        # since we need to store the transaction object for each transaction block,
-        # we need to wrap the connection with its own TransactionWrapper
-        return base_client.NestedTransactionContext(TransactionWrapper(self))
+        return _NestedTransactionContext(self)
 
     def acquire_connection(self) -> base_client.ConnectionWrapper[psycopg.AsyncConnection]:
-        return base_client.ConnectionWrapper(self._lock, self)
+        # The wrapper holds no per-use state, so every query of the transaction can share one.
+        # It is created lazily because the connection is only assigned once the transaction
+        # context has acquired it from the pool.
+        wrapper = self._connection_wrapper
+        if wrapper is None or wrapper.connection is not self._connection:
+            wrapper = self._connection_wrapper = base_client.ConnectionWrapper(self._lock, self)
+        return wrapper
+
+    async def execute_insert(self, query: str, values: list) -> Any | None:
+        # Batching would reorder the inserts relative to the other statements of the transaction
+        return await self._execute_insert(query, values)
 
     @postgres_client.translate_exceptions
     async def begin(self) -> None:
-        self._transaction = self._connection.transaction()
-        await self._transaction.__aenter__()
+        if self._connection.info.transaction_status == psycopg.pq.TransactionStatus.IDLE:
+            await self._connection.execute("BEGIN", prepare=False)
+            self._transactions.append(None)
+        else:
+            await self._savepoint()
 
     async def savepoint(self) -> None:
-        return await self.begin()
+        await self._savepoint()
 
-    async def commit(self) -> None:
-        if not self._transaction:
+    @postgres_client.translate_exceptions
+    async def _savepoint(self) -> psycopg.AsyncTransaction:
+        self._savepoint_count += 1
+        savepoint = psycopg.AsyncTransaction(
+            self._connection, savepoint_name=f"sp_{self._savepoint_count}"
+        )
+        await savepoint.__aenter__()
+        self._transactions.append(savepoint)
+        return savepoint
+
+    async def _end_savepoint(self, savepoint: psycopg.AsyncTransaction, rollback: bool) -> None:
+        # Savepoints can only be released in the reverse order of their creation, which
+        # concurrent nested blocks, e.g. run with asyncio.gather, don't guarantee.
+        if self._transactions and self._transactions[-1] is not savepoint:
+            raise exceptions.TransactionManagementError(
+                "Nested transactions must be exited in the reverse order they were entered"
+            )
+        if rollback:
+            await self.savepoint_rollback()
+        else:
+            await self.release_savepoint()
+
+    def _pop_transaction(self) -> psycopg.AsyncTransaction | None:
+        if not self._transactions:
             raise exceptions.TransactionManagementError("Transaction is in invalid state")
         if self._finalized:
             raise exceptions.TransactionManagementError("Transaction already finalised")
+        return self._transactions.pop()
 
-        await self._transaction.__aexit__(None, None, None)
+    async def commit(self) -> None:
+        await self.release_savepoint()
         self._finalized = True
 
+    @postgres_client.translate_exceptions
     async def release_savepoint(self) -> None:
-        await self.commit()
+        savepoint = self._pop_transaction()
+        if savepoint is None:
+            await self._connection.commit()
+        else:
+            await savepoint.__aexit__(None, None, None)
 
     async def rollback(self) -> None:
-        if not self._transaction:
-            raise exceptions.TransactionManagementError("Transaction is in invalid state")
-        if self._finalized:
-            raise exceptions.TransactionManagementError("Transaction already finalised")
-
-        await self._transaction.__aexit__(psycopg.Rollback, psycopg.Rollback(), None)
+        await self.savepoint_rollback()
         self._finalized = True
 
+    @postgres_client.translate_exceptions
     async def savepoint_rollback(self) -> None:
-        await self.rollback()
+        savepoint = self._pop_transaction()
+        # Both also drop the prepared statements, as the rollback may have undone DDL that
+        # they depend on.
+        if savepoint is None:
+            await self._connection.rollback()
+        else:
+            await savepoint.__aexit__(psycopg.Rollback, psycopg.Rollback(savepoint), None)